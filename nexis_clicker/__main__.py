@@ -1,42 +1,72 @@
 import asyncio
-import json
+import multiprocessing
 import re
-import shutil
 from calendar import monthrange
-from datetime import date, datetime, timedelta
-from os import environ
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from os import cpu_count, environ, replace
 from pathlib import Path
-from zipfile import ZipFile
 
-import dateparser
-import pandas as pd
 from tqdm.auto import tqdm
 from dotenv import load_dotenv
-from munch import Munch
-from playwright.async_api import Browser, BrowserContext, Page, async_playwright
-from striprtf.striprtf import rtf_to_text
+from playwright.async_api import (
+    Browser,
+    BrowserContext,
+    Page,
+    async_playwright,
+)
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+try:
+    from .processing import is_processed, process_download
+except ImportError:  # run as a script rather than with `python -m nexis_clicker`
+    from processing import is_processed, process_download
 
 load_dotenv()
 
 # config:
-cookie_path = Path("cookies.json")
 query = """(climate) NEAR/10 (protest* OR demo OR rally OR campaign OR "social movement" OR occup* OR strike OR petition OR riot OR unrest OR uprising OR boycott OR riot OR activis* OR resistance OR mobilization OR "citizens' initiative" OR march OR parade OR picket OR block* OR sit-in OR vigil OR "hunger strike" OR rebel* OR "civil disobedience")"""
 data_path = Path("data") / "climate-protests"
 data_path.mkdir(parents=True, exist_ok=True)
-
-
-def process_downloads():
+# the browser profile, including the login cookies:
+profile_path = data_path / "profile"
+# how often to try each month before moving on to the next one:
+max_attempts = 3
+# number of results in the results header, e.g. "(1.234)":
+n_results_re = re.compile(r"\(([\d.]+)\)")
+# the downloads are unpacked and parsed in the background
+# (in spawned processes, since forking the multi-threaded event loop process
+# can deadlock the children; they only need to import `processing`):
+process_pool = ProcessPoolExecutor(
+    max_workers=cpu_count(), mp_context=multiprocessing.get_context("spawn")
+)
+
+
+def process_downloads(force=False):
     """This function is not part of the main workflow
     you can run it after downloading everything to make sure all downloads are processed
     (some downloads might not be processed when the script is interrupted)
+
+    Args:
+        force (bool, optional): also process the zips that have already been
+            processed, e.g. after changing `parse`. Defaults to False.
     """
-    for path in sorted((data_path / "zip").glob("**/*.zip")):
-        process_download(path)
+    paths = sorted((data_path / "zip").glob("**/*.zip"))
+    if not force:
+        paths = [p for p in paths if not is_processed(p)]
+    # each zip is processed independently, so spread them across the processes
+    list(process_pool.map(process_download, paths, chunksize=4))
 
 
 async def clickthrough(
-    query=None, headless=True, start=2018, end=2024, backward=False
-) -> pd.DataFrame | None:
+    query=None,
+    headless=True,
+    start=2018,
+    end=2024,
+    backward=False,
+    n_workers=4,
+    max_downloads=2,
+) -> None:
     """The main workflow function
 
     Args:
@@ -45,67 +75,150 @@ async def clickthrough(
         start (int, optional): _description_. Defaults to 2008.
         end (int, optional): _description_. Defaults to 2024.
         backward (bool, optional): _description_. Defaults to False.
-
-    Returns:
-        pd.DataFrame | None: _description_
+        n_workers (int, optional): number of pages that work through
+            the months in parallel. Defaults to 4.
+        max_downloads (int, optional): maximum number of concurrent downloads.
+            Defaults to 2.
     """
+    context = await setup(headless=headless)  # open the browser
     try:
-        page, browser, context = await setup(headless=headless)  # open the browser
-        page, browser, context = await login(page, browser, context)  # login
-        page, browser, context = await search(
-            query, page, browser, context, backward=backward
-        )  # search and sort by date
-
         # now iterate through the results by month
         # (this is because only 1000 results can be downloaded at once,
         # so we need to split up the results in some way)
         months_and_years = [
             (month, year) for year in range(start, end) for month in range(1, 13)
         ]
-        q = tqdm(months_and_years, miniters=1, mininterval=0.1)
-        
-        for month, year in q:
+        q = tqdm(total=len(months_and_years), miniters=1, mininterval=0.1)
+        # each worker gets every n-th month and its own page
+        shards = [months_and_years[i::n_workers] for i in range(n_workers)]
+        existing_files = index_zips()
+        login_lock = asyncio.Lock()
+        download_slots = asyncio.Semaphore(max_downloads)
+        await asyncio.gather(
+            *[
+                worker(
+                    shard,
+                    query,
+                    context,
+                    existing_files,
+                    q,
+                    login_lock,
+                    download_slots,
+                    backward=backward,
+                )
+                for shard in shards
+            ]
+        )
+    finally:
+        await context.close()
+
+
+async def worker(
+    months_and_years: list[tuple[int, int]],
+    query: str,
+    context: BrowserContext,
+    existing_files: dict[str, list[str]],
+    q: tqdm,
+    login_lock: asyncio.Lock,
+    download_slots: asyncio.Semaphore,
+    backward: bool = False,
+):
+    """Search and download the given months in a separate page
+
+    Args:
+        months_and_years (list[tuple[int, int]]): _description_
+        query (str): _description_
+        context (BrowserContext): _description_
+        existing_files (dict[str, list[str]]): see `index_zips`
+        q (tqdm): _description_
+        login_lock (asyncio.Lock): only one worker logs in,
+            the others share its session
+        download_slots (asyncio.Semaphore): throttles concurrent downloads
+        backward (bool, optional): _description_. Defaults to False.
+    """
+    page = None
+    try:
+        page = await context.new_page()
+        browser = context.browser
+        async with login_lock:
+            page, browser, context = await login(page, browser, context)  # login
+        page, browser, context = await search(
+            query, page, browser, context, backward=backward
+        )  # search and sort by date
+
+        for month, year in months_and_years:
             q.set_description(f"{year}-{month:02d}")
-            
-            # narrow down the results to the given month
-            res = await search_by_month(
-                year, month, page, browser, context, backward=backward
-            )  
-            if res is None:
-                # continue if there are no results or the results are already downloaded
-                continue
-            page, browser, context = res
-            
-            # trigger the download and the conversion of the results
-            page, browser, context = await download(
-                year, month, page, browser, context, backward=backward, q=q
-            )  
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    if attempt > 1:
+                        # start over from a fresh search in the same page,
+                        # already downloaded files are skipped in this attempt
+                        page, browser, context = await search(
+                            query, page, browser, context, backward=backward
+                        )
+                    # narrow down the results to the given month
+                    res = await search_by_month(
+                        year,
+                        month,
+                        page,
+                        browser,
+                        context,
+                        existing_files,
+                        backward=backward,
+                    )
+                    if res is not None:
+                        page, browser, context = res
+
+                        # trigger the download and the conversion of the results
+                        async with download_slots:
+                            page, browser, context = await download(
+                                year,
+                                month,
+                                page,
+                                browser,
+                                context,
+                                backward=backward,
+                                q=q,
+                            )
+                    # (otherwise there are no results or they are already downloaded)
+                    break
+                except PlaywrightTimeoutError as e:
+                    _print(q, f"{year}-{month:02d} (attempt {attempt}):", e.message)
+            else:
+                _print(q, f"giving up on {year}-{month:02d}")
+            q.update()
     except Exception as e:
-        print(e)
-        # wait here for a longer time for debugging
-        await page.wait_for_timeout(5_000)
+        _print(q, e)
     finally:
-        await browser.close()
+        if page is not None:
+            await page.close()
 
 
-async def setup(headless=True) -> tuple[Page, Browser, BrowserContext]:
+async def setup(headless=True) -> BrowserContext:
     """Setup the browser
+    the browser profile is kept in `profile_path`, so that the login cookies
+    (those that outlive the browser, see `login`) and the HTTP cache with the
+    Nexis scripts can be reused in the next run
+    (don't add `context.route` handlers, since routing disables the HTTP cache;
+    since this is a persistent context, `context.browser` is None)
 
     Args:
         headless (bool, optional): _description_. Defaults to True.
 
     Returns:
-        tuple[Page, Browser, BrowserContext]: _description_
+        BrowserContext: _description_
     """
     path = data_path / "tmp"
     path.mkdir(parents=True, exist_ok=True)
     p = await async_playwright().start()
-    browser = await p.chromium.launch(
-        timeout=10_000, downloads_path=path, headless=headless
+    context = await p.chromium.launch_persistent_context(
+        user_data_dir=profile_path,
+        timeout=10_000,
+        downloads_path=path,
+        headless=headless,
+        reduced_motion="reduce",
     )
-    context = await browser.new_context()
-    page = await context.new_page()
-    return page, browser, context
+    return context
 
 
 async def click(page: Page, selector: str, n: int = 0, timeout=5_000) -> Page:
@@ -120,9 +233,7 @@ async def click(page: Page, selector: str, n: int = 0, timeout=5_000) -> Page:
     Returns:
         Page: _description_
     """
-    await page.wait_for_selector(selector, timeout=timeout)
-    els = await page.query_selector_all(selector)
-    await els[n].click()
+    await page.locator(selector).nth(n).click(timeout=timeout)
     return page
 
 
@@ -131,7 +242,8 @@ async def login(
 ) -> tuple[Page, Browser, BrowserContext]:
     """login to nexis
     ⚠️ the login is specific to your institution, so you may need to adjust this
-    if logged in within the previous hour, reuse that session
+    if the session in the browser profile is still valid, the search page
+    opens right away and the login is skipped
 
     Args:
         page (Page): _description_
@@ -141,21 +253,19 @@ async def login(
     Returns:
         tuple[Page, Browser, BrowserContext]: _description_
     """
-    if cookie_path.exists():
-        last_mod = datetime.fromtimestamp(cookie_path.stat().st_mtime)
-        time_passed = datetime.now() - last_mod
-        if time_passed < timedelta(hours=1):
-            await context.add_cookies(json.loads(cookie_path.read_text()))
-            return page, browser, context
-    print("Logging in ...")
     await page.goto(environ["NEXIS_URL"])
-    await page.wait_for_timeout(5_000)
+    # we end up either on the search page or on the login form
+    await page.locator('lng-expanding-textarea, input[id="user"]').first.wait_for(
+        timeout=60_000
+    )
+    if not await page.locator('input[id="user"]').is_visible():
+        return page, browser, context
+    print("Logging in ...")
     await page.fill('input[id="user"]', environ["NEXIS_USER"])
     await page.fill('input[id="pass"]', environ["NEXIS_PASSWORD"])
     await click(page, 'input[type="submit"]')
-    await page.wait_for_timeout(20_000)
-    cookies = await context.cookies()
-    cookie_path.write_text(json.dumps(cookies))
+    # wait until we are redirected to the nexis search page
+    await page.wait_for_selector("lng-expanding-textarea", timeout=60_000)
     return page, browser, context
 
 
@@ -180,35 +290,64 @@ async def search(
     """
     print("Searching", end=" ... ")
     await page.goto(environ["NEXIS_URL"])
+    await page.wait_for_load_state("networkidle")
     await page.fill("lng-expanding-textarea", query)
     await click(page, "lng-search-button")
     try:
-        await click(page, 'span[class="filter-text"]', timeout=15_000)
-        await page.wait_for_timeout(5_000)
+        await page.locator('span[class="filter-text"]').first.wait_for(timeout=15_000)
+        header = await results_header(page)
+        await click(page, 'span[class="filter-text"]')
+        await wait_for_results(page, header)
     except Exception:
         pass
+    # `click` waits for each selector to become visible, so no sleeps are needed
     await click(page, 'button[data-filtertype="source"]')
-    await page.wait_for_timeout(1_000)
     await click(page, 'button[data-action="moreless"]')
-    await page.wait_for_timeout(5_000)
-    el = await page.query_selector('input[data-value="Agence France Presse - English"]')
-    await el.dispatch_event("click")
-    await page.wait_for_timeout(5_000)
+    header = await results_header(page)
+    await page.locator(
+        'input[data-value="Agence France Presse - English"]'
+    ).first.dispatch_event("click")
+    await wait_for_results(page, header)
     await click(page, 'span[id="sortbymenulabel"]')
-    await page.wait_for_timeout(1_000)
     order = "descending" if backward else "ascending"
-    await click(page, f'button[data-value="date{order}"]')
-    await page.wait_for_timeout(5_000)
+    option = page.locator(f'button[data-value="date{order}"]').first
+    label = (await option.inner_text(timeout=5_000)).strip()
+    await option.click(timeout=5_000)
+    # sorting does not change the number of results,
+    # so wait for the sort menu to show the chosen order instead
+    # (this returns right away if the results were already sorted that way)
+    try:
+        await page.wait_for_function(
+            """(label) => document.querySelector('#sortbymenulabel')
+                ?.innerText.includes(label)""",
+            arg=label,
+            timeout=10_000,
+        )
+    except PlaywrightTimeoutError:
+        pass
     print("✅")
     return page, browser, context
 
 
+def index_zips() -> dict[str, list[str]]:
+    """Find the already downloaded zip files with a single directory scan
+
+    Returns:
+        dict[str, list[str]]: zip filenames by month (YYYY-MM)
+    """
+    existing_files = {}
+    for path in (data_path / "zip").glob("*/*.zip"):
+        existing_files.setdefault(path.parent.name, []).append(path.name)
+    return existing_files
+
+
 async def search_by_month(
     year: int,
     month: int,
     page: Page,
     browser: Browser,
     context: BrowserContext,
+    existing_files: dict[str, list[str]],
     backward: bool = False,
 ) -> tuple[Page, Browser, BrowserContext] | None:
     """Narrow down the search results to a specific month
@@ -219,45 +358,88 @@ async def search_by_month(
         page (Page): _description_
         browser (Browser): _description_
         context (BrowserContext): _description_
+        existing_files (dict[str, list[str]]): see `index_zips`
         backward (bool, optional): _description_. Defaults to False.
 
     Returns:
         tuple[Page, Browser, BrowserContext] | None: _description_
     """
-    existing_files = list((data_path / "zip").glob(f"{year}-{month:02d}/*.zip"))
-    if any([not a.name.endswith("00.zip") for a in existing_files]):
+    existing = existing_files.get(f"{year}-{month:02d}", [])
+    if any(not name.endswith("00.zip") for name in existing):
         # then we already have all files for this month
         return None
-    if any([a.name.endswith("000.zip") for a in existing_files]):
+    if any(name.endswith("000.zip") for name in existing):
         # can't download more than 1000 files per query in a straightforward way
         # but backwards one can download another 1000, so you can double the amount
         # alternatively use smaller date ranges such as weeks
         if not backward:
             return None
     try:
-        await click(page, 'span[class="filter-text"]', n=1)
+        # remove the date filter of the previous month, if there is one;
+        # counting first avoids waiting out the click timeout on the first month
+        chips = page.locator('span[class="filter-text"]')
+        if await chips.count() > 1:
+            header = await results_header(page)
+            await chips.nth(1).click(timeout=5_000)
+            await wait_for_results(page, header)
     except Exception:
         pass
-    await page.wait_for_timeout(5_000)
     try:
         await click(
             page, 'button[data-filtertype="datestr-news"][data-action="expand"]'
         )
     except Exception:
         pass
-    await page.wait_for_timeout(3_000)
+    # `fill` waits for the inputs to become editable
     await page.fill('input[class="min-val"]', f"01/{month}/{year}")
-    await page.wait_for_timeout(2_000)
     day = monthrange(year, month)[1]
     await page.fill('input[class="max-val"]', f"{day}/{month}/{year}")
-    await page.wait_for_timeout(2_000)
     await click(page, 'div[class="date-form"]')
-    await page.wait_for_timeout(1_000)
+    # the number of results is read from the header in `download`,
+    # so wait until it shows the filtered results
+    header = await results_header(page)
     await click(page, 'button[class="save btn secondary"]')
-    await page.wait_for_timeout(10_000)
+    await wait_for_results(page, header)
     return page, browser, context
 
 
+async def results_header(page: Page) -> str | None:
+    """Read the results header, which contains the number of results
+
+    Args:
+        page (Page): _description_
+
+    Returns:
+        str | None: _description_
+    """
+    return await page.evaluate(
+        "document.querySelector('header.resultsHeader')?.innerText ?? null"
+    )
+
+
+async def wait_for_results(page: Page, old_header: str | None, timeout=10_000):
+    """Wait until the results header differs from `old_header`
+    if the number of results happens to stay the same, this waits for the full
+    timeout, just like the fixed sleep that it replaces
+
+    Args:
+        page (Page): _description_
+        old_header (str | None): _description_
+        timeout (int, optional): _description_. Defaults to 10_000.
+    """
+    try:
+        await page.wait_for_function(
+            """(old) => {
+                const text = document.querySelector('header.resultsHeader')?.innerText;
+                return text && text.includes('(') && text !== old;
+            }""",
+            arg=old_header,
+            timeout=timeout,
+        )
+    except PlaywrightTimeoutError:
+        pass
+
+
 def _print(q, *args, end="\n"):
     """print while a tqdm progress bar is running
 
@@ -294,140 +476,107 @@ async def download(
     Returns:
         tuple[Page, Browser, BrowserContext]: _description_
     """
-    el = await page.query_selector('header[class="resultsHeader"]')
-    n_results = int(
-        re.search(r"\(((\d|\.)+)\)", await el.inner_text()).group(1).replace(".", "")
-    )
+    header = await page.locator('header[class="resultsHeader"]').first.inner_text()
+    n_results = int(n_results_re.search(header).group(1).replace(".", ""))
     if not backward:
         r = range(0, min(n_results, n), 100)
     if backward:
         r = range(0, min(n_results - n, n), 100)
-    for i in r:
-        if not backward:
-            x, y = i + 1, min(i + 100, n_results)
-        if backward:
-            x, y = i + 1, min(i + 100, n_results - 1000)
-        range_ = f"{x}-{y}" if x != y else f"{x}"
-        b = "B" if backward else ""
-        dest_path = data_path / f"zip/{year}-{month:02d}/{b}{range_}.zip"
-        dest_path.parent.mkdir(parents=True, exist_ok=True)
-        if dest_path.exists():
-            continue
-        _print(
-            q,
-            datetime.now().strftime("%H:%M:%S"),
-            "Downloading",
-            dest_path,
-            end=" ... ",
-        )
-        el = await page.query_selector('span[class="icon la-Download"]')
-        await el.dispatch_event("click")
-        await page.wait_for_timeout(2_000)
-        await page.click('a[id="tab-FormattingOptions"]')
-        checkboxes_1 = await page.query_selector_all(
-            'fieldset[class="IncludeOptions"] input[type="checkbox"]'
-        )
-        checkboxes_2 = await page.query_selector_all(
-            'fieldset[class="styling"] input[type="checkbox"]'
-        )
-        for checkbox in checkboxes_1 + checkboxes_2:
-            if await checkbox.bounding_box():
-                await checkbox.set_checked(False)
-                await page.wait_for_timeout(200)
-        await page.click('a[id="tab-BasicOptions"]')
-        await page.wait_for_timeout(500)
-        checkbox = await page.query_selector('input[id="SeparateFiles"]')
-        await checkbox.set_checked(True)
-        checkbox = await page.query_selector('input[id="Rtf"]')
-        await checkbox.set_checked(True)
-        await page.wait_for_timeout(1_000)
-        await page.fill('input[id="SelectedRange"]', range_)
-        async with page.expect_download(timeout=120_000) as download_info:
-            await click(page, 'button[data-action="download"]')
-        download = await download_info.value
-        tmp_path = await download.path()
-        shutil.move(tmp_path, dest_path)
-        _print(q, "✅")
-        process_download(dest_path)
-        # await page.wait_for_timeout(120_000)
-        await page.wait_for_timeout(5_000)
-    return page, browser, context
-
-
-def unpack(path: Path) -> list[tuple[str, str]]:
-    """Unpack zip to rtfs and convert to plaintexts
-
-    Args:
-        path (Path): _description_
-
-    Returns:
-        list[tuple[str, str]]: _description_
-    """
-    with ZipFile(path) as zipObj:
-        plaintexts = []
-        for file in zipObj.filelist:
-            if "_doclist" in file.filename:
+    # locators are lazy, so they can be reused across iterations
+    download_icon = page.locator('span[class="icon la-Download"]').first
+    formatting_tab = page.locator('a[id="tab-FormattingOptions"]')
+    basic_tab = page.locator('a[id="tab-BasicOptions"]')
+    separate_files = page.locator('input[id="SeparateFiles"]')
+    rtf_format = page.locator('input[id="Rtf"]')
+    selected_range = page.locator('input[id="SelectedRange"]')
+    download_button = page.locator('button[data-action="download"]').first
+    # downloaded files are handed over to `store_downloads`,
+    # so that the next download can start right away
+    downloads = asyncio.Queue(maxsize=2)
+    consumer = asyncio.create_task(store_downloads(downloads))
+    try:
+        for i in r:
+            if not backward:
+                x, y = i + 1, min(i + 100, n_results)
+            if backward:
+                x, y = i + 1, min(i + 100, n_results - 1000)
+            range_ = f"{x}-{y}" if x != y else f"{x}"
+            b = "B" if backward else ""
+            dest_path = data_path / f"zip/{year}-{month:02d}/{b}{range_}.zip"
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            if dest_path.exists():
                 continue
-            rtf = zipObj.read(file).decode(encoding="latin-1")
-            plaintext = rtf_to_text(rtf, encoding="latin-1").strip()
-            plaintext = plaintext.replace("\xa0", " ")
-            plaintexts.append((file.filename, plaintext))
-    return plaintexts
+            _print(
+                q,
+                datetime.now().strftime("%H:%M:%S"),
+                "Downloading",
+                dest_path,
+                end=" ... ",
+            )
+            await download_icon.dispatch_event("click")
+            await formatting_tab.click()
+            # uncheck all visible formatting options in a single call
+            # (this only clicks boxes that are still checked, so it is cheap
+            # when the dialog remembers the options from the last download)
+            await page.evaluate(
+                """(selector) => document.querySelectorAll(selector).forEach((cb) => {
+                    if (cb.offsetParent !== null && cb.checked) cb.click();
+                })""",
+                'fieldset[class="IncludeOptions"] input[type="checkbox"], '
+                'fieldset[class="styling"] input[type="checkbox"]',
+            )
+            await basic_tab.click()
+            await separate_files.check()
+            await rtf_format.check()
+            await selected_range.fill(range_)
+            async with page.expect_download(timeout=120_000) as download_info:
+                await download_button.click()
+            download = await download_info.value
+            tmp_path = await download.path()
+            _print(q, "✅")
+            await hand_over(downloads, consumer, (tmp_path, dest_path))
+            # wait for the download dialog to close before opening it again
+            await download_button.wait_for(state="hidden")
+        await hand_over(downloads, consumer, None)
+        await consumer
+    finally:
+        consumer.cancel()
+    return page, browser, context
 
 
-def parse(plaintext: str) -> dict:
-    """Parse metadata and text from plaintext
-    this is partially specific to Agence France Presse's format,
-    so you may need to adjust this
-    also consider using https://github.com/JBGruber/LexisNexisTools for this part ❤️
+async def hand_over(downloads: asyncio.Queue, consumer: asyncio.Task, item):
+    """Put an item on the queue, unless the consumer has failed
+    (otherwise we would wait forever for space in the queue)
 
     Args:
-        plaintext (str): _description_
-
-    Returns:
-        dict: _description_
+        downloads (asyncio.Queue): _description_
+        consumer (asyncio.Task): the `store_downloads` task
+        item (_type_): _description_
     """
-    title, rest = plaintext.split("\n", 1)
-    feed, rest = rest.split("\n", 1)
-    date, rest = rest.split("\n", 1)
-    date = dateparser.parse(date.strip(), languages=["en"])
-    location = re.findall(r"Dateline:\s?(.+),[^,]+\n", rest)
-    location = location[0] if len(location) > 0 else None
-    if ", " in location:
-        location, country = location.rsplit(", ", 1)
-    else:
-        country = None
-    meta, rest = rest.split("Body", 1)
-    if "Graphic" in rest:
-        text, _ = rest.split("Graphic", 1)
-    else:
-        text, _ = rest.split("Load-Date", 1)
-    return Munch(
-        date=date.strftime("%Y-%m-%d") if date is not None else None,
-        country=country,
-        location=location,
-        source=feed.strip(),
-        title=title.strip(),
-        text=text.strip(),
-    )
+    put = asyncio.ensure_future(downloads.put(item))
+    await asyncio.wait({put, consumer}, return_when=asyncio.FIRST_COMPLETED)
+    if not put.done():
+        put.cancel()
+        # raises the exception of the consumer
+        await consumer
+        raise RuntimeError("store_downloads stopped early")
 
 
-def process_download(path: Path):
-    """Unpack and parse and store in the right directory and filename
+async def store_downloads(downloads: asyncio.Queue):
+    """Move downloaded files to their destination and process them in the background
 
     Args:
-        path (Path): _description_
+        downloads (asyncio.Queue): (tmp_path, dest_path) tuples, terminated by None
     """
-    texts = unpack(path)
-    for fn, text in texts:
-        item = parse(text)
-        if not item.date:
-            print(f"No date for {fn}, {item.title}")
-            continue
-        datestr = date.strftime(dateparser.parse(item.date), "%Y-%m-%d")
-        jpath = data_path / "json" / datestr / f"{fn}.json"
-        jpath.parent.mkdir(parents=True, exist_ok=True)
-        jpath.write_text(json.dumps(item, indent=2, ensure_ascii=False))
+    loop = asyncio.get_running_loop()
+    pending = []
+    while (item := await downloads.get()) is not None:
+        tmp_path, dest_path = item
+        # the downloads folder is in `data_path`, so this is a cheap rename
+        await asyncio.to_thread(replace, tmp_path, dest_path)
+        # parse in the background while the next download is running
+        pending.append(loop.run_in_executor(process_pool, process_download, dest_path))
+    await asyncio.gather(*pending)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,294 @@
+"""Unpacking and parsing of the downloaded zips
+
+this runs in the worker processes of `process_pool` in `__main__`,
+so it is kept in its own module that the spawned processes can import
+"""
+import codecs
+import re
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from zipfile import ZipFile
+
+# (dateparser, pandas and striprtf are imported where they are needed,
+# because they are slow to import)
+
+# date format used by AFP ("September 9, 2017 Saturday"),
+# tried before falling back to the slow `dateparser`:
+date_re = re.compile(r"([A-Z][a-z]+) (\d{1,2}), (\d{4})\b")
+months = {
+    name: i + 1
+    for i, name in enumerate(
+        ["January", "February", "March", "April", "May", "June", "July"]
+        + ["August", "September", "October", "November", "December"]
+    )
+}
+# patterns for parsing the plaintexts:
+dateline_re = re.compile(
+    r"Dateline:\s?(?P<location>[^\n]+?)(?:, (?P<country>[^,\n]+))?,[^,\n]*\n"
+)
+# like `striprtf.striprtf.PATTERN`, but matching runs of plain text at once:
+rtf_token_re = re.compile(
+    r"\\([a-z]{1,32})(-?\d{1,10})?[ ]?|\\'([0-9a-f]{2})|\\([^a-z])|([{}])|[\r\n]+"
+    r"|([^\\{}\r\n]+)",
+    re.IGNORECASE,
+)
+# braces, skipping escaped characters:
+rtf_brace_re = re.compile(r"\\[\\{}]|[{}]")
+# columns of the parquet files, all stored as strings so that the files
+# of different zips can be read together:
+columns = ["date", "country", "location", "source", "title", "text", "file"]
+# characters to replace in the plaintexts:
+char_table = str.maketrans({"\xa0": " ", "\u2028": "\n", "\u2029": "\n"})
+
+
+def rtf_to_plaintext(rtf: str, encoding: str = "cp1252") -> str:
+    """Convert rtf to plaintext
+    this follows `striprtf.striprtf.rtf_to_text` but is much faster,
+    because it does not loop over the text character by character;
+    falls back to `striprtf` if it fails or yields no text
+
+    Args:
+        rtf (str): _description_
+        encoding (str, optional): _description_. Defaults to "cp1252".
+
+    Returns:
+        str: _description_
+    """
+    from striprtf.striprtf import rtf_to_text
+
+    try:
+        plaintext = _rtf_to_plaintext(rtf, encoding)
+    except (ValueError, LookupError):
+        plaintext = ""
+    if not plaintext.strip():
+        plaintext = rtf_to_text(rtf, encoding=encoding)
+    return plaintext
+
+
+def _rtf_to_plaintext(rtf: str, encoding: str) -> str:
+    from striprtf.striprtf import HYPERLINKS, destinations, specialchars
+
+    rtf = HYPERLINKS.sub("\\1(\\2)", rtf)
+    stack = []
+    ignorable = False  # whether this group (and all inside it) are ignorable
+    ucskip = 1  # number of characters to skip after a unicode character
+    curskip = 0  # number of characters left to skip
+    hexes = bytearray()
+    out = []
+    pos = 0
+    while pos < len(rtf):
+        for match in rtf_token_re.finditer(rtf, pos):
+            word, arg, hex_, char, brace, text = match.groups()
+            if hexes and not hex_:
+                out.append(hexes.decode(encoding))
+                hexes.clear()
+            if brace:
+                curskip = 0
+                if brace == "{":
+                    stack.append((ucskip, ignorable))
+                elif stack:
+                    ucskip, ignorable = stack.pop()
+                else:
+                    ucskip, ignorable = 0, True
+            elif char:  # \x (not a letter)
+                curskip = 0
+                if char in specialchars:
+                    if not ignorable:
+                        out.append(specialchars[char])
+                elif char == "*":
+                    ignorable = True
+            elif word:  # \foo
+                curskip = 0
+                if word in destinations:
+                    ignorable = True
+                elif word == "ansicpg":
+                    encoding = f"cp{arg}"
+                    try:
+                        codecs.lookup(encoding)
+                    except LookupError:
+                        encoding = "utf8"
+                if ignorable:
+                    pass
+                elif word in specialchars:
+                    out.append(specialchars[word])
+                elif word == "uc":
+                    ucskip = int(arg)
+                elif word == "u":
+                    if arg is not None:
+                        c = int(arg)
+                        out.append(chr(c + 0x10000 if c < 0 else c))
+                    curskip = ucskip
+            elif hex_:  # \'xx
+                if curskip > 0:
+                    curskip -= 1
+                elif not ignorable:
+                    hexes.append(int(hex_, 16))
+            elif text:
+                if curskip > 0:
+                    n = min(curskip, len(text))
+                    text = text[n:]
+                    curskip -= n
+                if text and not ignorable:
+                    out.append(text)
+            if ignorable:
+                # jump over the rest of the group instead of tokenizing it
+                pos = _skip_group(rtf, match.end())
+                break
+        else:
+            pos = len(rtf)
+    if hexes:
+        out.append(hexes.decode(encoding))
+    return "".join(out)
+
+
+def _skip_group(rtf: str, pos: int) -> int:
+    # find the closing brace of the current group
+    depth = 0
+    for match in rtf_brace_re.finditer(rtf, pos):
+        brace = match.group()
+        if brace == "{":
+            depth += 1
+        elif brace == "}":
+            if depth == 0:
+                return match.start()
+            depth -= 1
+    return len(rtf)
+
+
+def unpack(path: Path) -> list[tuple[str, str]]:
+    """Unpack zip to rtfs and convert to plaintexts
+
+    Args:
+        path (Path): _description_
+
+    Returns:
+        list[tuple[str, str]]: _description_
+    """
+    with ZipFile(path) as zipObj:
+        plaintexts = []
+        names = [n for n in zipObj.namelist() if "_doclist" not in n]
+        for name in names:
+            with zipObj.open(name) as f:
+                rtf = f.read().decode(encoding="latin-1")
+            plaintext = rtf_to_plaintext(rtf, encoding="latin-1").translate(char_table)
+            plaintexts.append((name, plaintext.strip()))
+    return plaintexts
+
+
+def parse_date(date_str: str) -> datetime | None:
+    """Parse a date, trying the known formats first
+
+    Args:
+        date_str (str): _description_
+
+    Returns:
+        datetime | None: _description_
+    """
+    match = date_re.match(date_str)
+    if match is not None and match.group(1) in months:
+        month, day, year = match.groups()
+        try:
+            return datetime(int(year), months[month], int(day))
+        except ValueError:
+            pass
+    return _date_parser().get_date_data(date_str).date_obj
+
+
+@lru_cache
+def _date_parser():
+    # loading the locale data is slow, so only do it once per process
+    import dateparser
+
+    return dateparser.DateDataParser(languages=["en"])
+
+
+def parse(plaintext: str) -> dict:
+    """Parse metadata and text from plaintext
+    this is partially specific to Agence France Presse's format,
+    so you may need to adjust this
+    also consider using https://github.com/JBGruber/LexisNexisTools for this part ❤️
+
+    Args:
+        plaintext (str): _description_
+
+    Returns:
+        dict: _description_
+    """
+    title, feed, date, rest = plaintext.split("\n", 3)
+    date = parse_date(date.strip())
+    dateline = dateline_re.search(rest)
+    if dateline is not None:
+        location, country = dateline.group("location", "country")
+    else:
+        location = country = None
+    meta, body, rest = rest.partition("Body")
+    if body:
+        text, graphic, _ = rest.partition("Graphic")
+        if not graphic:
+            text, _, _ = rest.partition("Load-Date")
+        text = text.strip()
+    else:
+        # no text found, see `process_download`
+        text = None
+    return {
+        "date": date.strftime("%Y-%m-%d") if date is not None else None,
+        "country": country,
+        "location": location,
+        "source": feed.strip(),
+        "title": title.strip(),
+        "text": text,
+    }
+
+
+def process_download(path: Path):
+    """Unpack and parse and store all articles of the zip in one parquet file
+    (the results can be read with `pd.read_parquet(data_path / "parquet")`)
+
+    Args:
+        path (Path): _description_
+    """
+    import pandas as pd
+
+    texts = unpack(path)
+    items = []
+    for fn, text in texts:
+        item = parse(text)
+        if not item["date"]:
+            print(f"No date for {fn}, {item['title']}")
+            continue
+        if item["text"] is None:
+            print(f"No body for {fn}, {item['title']}")
+            continue
+        item["file"] = fn
+        items.append(item)
+    ppath = parquet_path(path)
+    ppath.parent.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(items, columns=columns).astype("string")
+    df.to_parquet(ppath, compression="zstd", index=False)
+
+
+def parquet_path(path: Path) -> Path:
+    """Where the articles of a zip are stored
+    (next to the "zip" folder, so this does not depend on `data_path`)
+
+    Args:
+        path (Path): _description_
+
+    Returns:
+        Path: _description_
+    """
+    return path.parents[2] / "parquet" / path.parent.name / f"{path.stem}.parquet"
+
+
+def is_processed(path: Path) -> bool:
+    """Check whether a zip has been processed since it was downloaded
+
+    Args:
+        path (Path): _description_
+
+    Returns:
+        bool: _description_
+    """
+    ppath = parquet_path(path)
+    return ppath.exists() and ppath.stat().st_mtime >= path.stat().st_mtime